@@ -2,8 +2,71 @@ import numpy as np
 from astropy import units as u
 import hmbp
 import matplotlib.pyplot as plt
-import io
-import sys
+import os
+import contextlib
+import functools
+from math import sqrt
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_skycalc(filter_name, airmass, pwv):
+    """
+    Memoized wrapper around `hmbp.in_skycalc_background`, which queries the online SkyCalc service.
+    Only takes hashable arguments so it can be shared by all HAWKI_ETC instances.
+    """
+    # Discard stdout and stderr to suppress unwanted warnings from the `hmbp.in_skycalc_background` function.
+    # Only needed on a cache miss, cached results are returned without touching the streams.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        return hmbp.in_skycalc_background(filter_name, airmass=airmass, pwv=pwv)
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_zero_vega(filter_name):
+    """
+    Memoized wrapper around `hmbp.in_zero_vega_mags` for the HAWKI filters at Paranal, so each filter curve is
+    only fetched once. Returns the photon rate of a 0 mag (Vega) star as a float in ph / s / m^2.
+    """
+    return hmbp.in_zero_vega_mags(filter_name, "HAWKI", "Paranal").to_value(u.ph / u.s / u.m ** 2)
+
+
+def _instance_cache(*state):
+    """
+    Caches the results of a method in the instance's `_method_cache`, keyed by method name, arguments and the
+    current values of the instance attributes named in `state`, so changing any of them is a cache miss.
+    Unlike `functools.lru_cache` on a method, the cache does not hold a reference to `self`. Meant for methods
+    returning immutable values (floats); a cached Quantity would be shared with, and mutable by, every caller.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrap(self, *args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())), tuple(getattr(self, name) for name in state))
+            cache = self._method_cache
+            if key not in cache:
+                cache[key] = fn(self, *args, **kwargs)
+            return cache[key]
+        return wrap
+    return decorator
+
+
+def _vega_mag(star_flux):
+    """
+    Returns the star flux as a plain Vega magnitude, or None if it is given in other flux units
+    (AB magnitudes, Jansky). Plain floats are taken as Vega magnitudes, like hmbp does.
+    """
+    if isinstance(star_flux, u.Quantity) and star_flux.unit != u.mag:
+        return None
+    return u.Quantity(star_flux, u.mag).value
+
+
+def _snr(signal, bg):
+    """
+    Computes signal / sqrt(signal + bg) elementwise for an array of signals in electrons, reusing a
+    single output buffer instead of allocating a temporary for each operation.
+    """
+    out = np.add(signal, bg)
+    np.sqrt(out, out=out)
+    np.divide(signal, out, out=out)
+    return out
 
 
 class HAWKI_ETC:
@@ -11,7 +74,40 @@ class HAWKI_ETC:
     Exposure Time Calculator (ETC) for the HAWKI imager instrument on the VLT.
     This class provides methods to compute various noise components, signal-to-noise ratio,
     and plots the SNR as a function of brightness.
+    Setting `exposure_time` or `seeing` recomputes the detector noise and flux conversion factors derived from them.
     """
+    # No per-instance __dict__, attribute access goes through slot descriptors
+    __slots__ = (
+        "DIT",
+        "NDIT",
+        "_exposure_time",
+        "airmass",
+        "pwv",
+        "_seeing",
+        "telescope_size",
+        "collection_area",
+        "quantum_efficiency",
+        "pixel_scale",
+        "_aper",
+        "_n_pix",
+        "_dark_aper",
+        "_read_noise_sq",
+        "_photon_to_electron",
+        "_flux_to_electron",
+        "_method_cache",
+    )
+
+    # Units are composed once so that attaching them with `<<` does not rebuild a CompositeUnit every time
+    _AREA_UNIT = u.m ** 2
+    _ELECTRON_PER_PH = u.electron / u.ph
+    _ARCSEC_PER_PIX = u.arcsec / u.pixel
+    _PIX_AREA_UNIT = u.pixel ** 2
+    _PHOTON_RATE_UNIT = u.ph / u.s / u.m ** 2
+    _ELECTRON_SQ = u.electron ** 2
+    # Detector parameters
+    _DARK_CURRENT = 0.0125 # electron / s / pixel^2, between 0.10 and 0.15 in the manual
+    _READ_NOISE = 8.5 # electron / pixel, between 5 and 12 in the manual
+
     def __init__(self, DIT=60, NDIT=60 , airmass=2.0, pwv=5.0, seeing=0.8 * u.arcsec):
         """
         Initializes the HAWKI_ETC with given parameters or defaults.
@@ -24,16 +120,74 @@ class HAWKI_ETC:
 
         self.DIT = DIT
         self.NDIT = NDIT
-        self.exposure_time = self.DIT * self.NDIT * u.s
+        self._exposure_time = (self.DIT * self.NDIT) << u.s
         self.airmass = airmass
         self.pwv = pwv
-        self.seeing = seeing
+        self._seeing = seeing
         # Telescope parameters
-        self.telescope_size = np.pi * (4 * u.m) ** 2
+        self.telescope_size = (np.pi * 4.0 ** 2) << self._AREA_UNIT
         self.collection_area = self.telescope_size # assumes perfect efficiency
-        self.quantum_efficiency = 0.9 * (u.electron / u.ph) # approximation based on plots in the user manual
-        self.pixel_scale = 0.106 * u.arcsec / u.pixel
-        self.aper = np.pi * self.seeing ** 2.0 # simplified, just based on seeing (0.8'' as given by the calculator)
+        self.quantum_efficiency = 0.9 << self._ELECTRON_PER_PH # approximation based on plots in the user manual
+        self.pixel_scale = 0.106 << self._ARCSEC_PER_PIX
+        # Background per filter, keyed on `airmass` and `pwv` as well so changing them needs no invalidation
+        self._method_cache = {}
+        self._update_derived()
+
+    def _update_derived(self):
+        """
+        Computes the values derived from the exposure time and seeing, and drops the cached results that used them.
+        Called from __init__ and from the `exposure_time` and `seeing` setters.
+        """
+        # Aperture area, simplified to be just based on seeing (0.8'' as given by the calculator). The seeing
+        # (a Quantity, or a float in arcsec) is squared as a plain float to skip Quantity.__pow__.
+        seeing = u.Quantity(self._seeing, u.arcsec).to_value(u.arcsec)
+        self._aper = (np.pi * seeing ** 2) << u.arcsec ** 2
+        # Number of pixels covered by the aperture (in pixel^2), only depends on the seeing
+        self._n_pix = (self.aper / self.pixel_scale ** 2).to_value(self._PIX_AREA_UNIT)
+        # Detector noise over the aperture, in electron and electron^2
+        self._dark_aper = self._DARK_CURRENT * self._n_pix * self.exposure_time.to_value(u.s)
+        self._read_noise_sq = self._READ_NOISE ** 2 * self._n_pix
+        # Conversion factors from photon rates (ph / s / m^2, per arcsec^2 for the sky) to collected electrons,
+        # so the per-filter arithmetic can be done on plain floats
+        self._photon_to_electron = (self.collection_area * self.quantum_efficiency * self.exposure_time).to_value(
+            u.electron / self._PHOTON_RATE_UNIT
+        )
+        self._flux_to_electron = self._photon_to_electron * self.aper.to_value(u.arcsec ** 2)
+        self._method_cache.clear()
+
+    @property
+    def exposure_time(self):
+        """
+        Total exposure time, DIT * NDIT unless set explicitly.
+        :return: Exposure time in seconds.
+        """
+        return self._exposure_time
+
+    @exposure_time.setter
+    def exposure_time(self, value):
+        self._exposure_time = u.Quantity(value, u.s)
+        self._update_derived()
+
+    @property
+    def seeing(self):
+        """
+        Seeing.
+        :return: Seeing in arcseconds.
+        """
+        return self._seeing
+
+    @seeing.setter
+    def seeing(self, value):
+        self._seeing = value
+        self._update_derived()
+
+    @property
+    def aper(self):
+        """
+        Aperture area based on the seeing, recomputed whenever `seeing` is set.
+        :return: Aperture area in arcsec^2.
+        """
+        return self._aper
 
     def sky_noise(self, filter_name):
         """
@@ -41,72 +195,116 @@ class HAWKI_ETC:
         collection area, and aperture.
 
         :param filter_name: Name of the filter.
-        :return: Sky noise value.
+        :return: Sky noise value in electrons.
         """
-        # Redirect stdout and stderr to suppress unwanted warnings from the `hmbp.in_skycalc_background` function.
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = io.StringIO()
-        sys.stderr = io.StringIO()
-
-        try:
-            sky = hmbp.in_skycalc_background(filter_name, airmass=self.airmass, pwv=self.pwv) / (u.arcsec ** 2)
-        finally:
-            # Reset stdout and stderr to their original values after capturing the output
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+        return self._sky_electrons(filter_name) << u.electron
 
-        sky_aper = sky * self.quantum_efficiency * self.exposure_time * self.collection_area * self.aper
-        return sky_aper
+    def _sky_electrons(self, filter_name):
+        """
+        Unitless version of `sky_noise`.
+        :param filter_name: Name of the filter.
+        :return: Sky noise value in electrons (float).
+        """
+        sky = _cached_skycalc(filter_name, self.airmass, self.pwv).to_value(self._PHOTON_RATE_UNIT) # per arcsec^2
+        return sky * self._flux_to_electron
 
     def dark_current_noise(self):
         """
         Computes the dark current noise based on the aperture, pixel scale, and exposure time.
-        :return: Dark current noise value.
+        :return: Dark current noise value in electrons.
         """
-        n_pix = self.aper / self.pixel_scale ** 2.0
-        dark_current = 0.0125 * u.electron / u.second / u.pixel ** 2 # between 0.10 and 0.15 in the manual
-        dark_aper = dark_current * n_pix * self.exposure_time
-        return dark_aper
+        return self._dark_aper << u.electron
 
     def read_noise(self):
         """
         Calculates the squared read noise over the aperture.
         :return: Squared read noise value in electron^2.
         """
-        n_pix = self.aper / self.pixel_scale ** 2.0
-        read_noise_per_pixel = 8.5 * u.electron / u.pixel  # between 5 and 12 in the manual
-        squared_read_noise_aper = (read_noise_per_pixel ** 2) * n_pix
-        return squared_read_noise_aper
+        return self._read_noise_sq << self._ELECTRON_SQ
 
-    def compute_sn(self, star_flux, filter_name="Ks"):
+    @_instance_cache("airmass", "pwv")
+    def _background_electrons(self, filter_name):
         """
-        Computes the signal-to-noise ratio (SNR) for a given star flux and filter name.
+        Sums the sky, dark current and read noise terms for a given filter. None of them depend on
+        the star flux, so the result is cached per filter and observing conditions.
+        :param filter_name: Name of the filter.
+        :return: Total background in electrons (float).
+        """
+        # Plain float sum of the precomputed terms, without wrapping each of them in a Quantity first
+        return self._sky_electrons(filter_name) + self._dark_aper + self._read_noise_sq
+
+    def _photon_rates(self, mags, filter_name):
+        """
+        Gets the star photon rates for Vega magnitudes by scaling the filter zero point, which is what
+        `hmbp.for_flux_in_filter` does internally (it scales the Vega spectrum by 10**(-0.4 * mag)).
+        :param mags: Magnitude or array of magnitudes.
+        :param filter_name: Name of the filter.
+        :return: Photon rates in ph / s / m^2 (float or ndarray).
+        """
+        return _cached_zero_vega(filter_name) * 10 ** (-0.4 * u.Quantity(mags, u.mag).value)
+
+    def precompute_grid(self, filter_name, mag_min=8, mag_max=26, step=0.1):
+        """
+        Tabulates the signal over a grid of Vega magnitudes for a given filter. The signal is a closed-form
+        scaling of the filter zero point, so `compute_sn` does not need the table; this fetches the zero point
+        up front and returns the tabulated values.
+        :param filter_name: Name of the filter.
+        :param mag_min: Brightest magnitude of the grid.
+        :param mag_max: Faintest magnitude of the grid.
+        :param step: Grid step in magnitudes, rounded so that a whole number of steps spans the range.
+        :return: Magnitude grid and signal grid in electrons.
+        """
+        if not mag_min < mag_max:
+            raise ValueError(f"mag_min has to be smaller than mag_max, {mag_min} and {mag_max} are given.")
+        if not step > 0:
+            raise ValueError(f"step has to be positive, {step} is given.")
+        n_steps = max(int(round((mag_max - mag_min) / step)), 1)
+        mag_grid = np.linspace(mag_min, mag_max, n_steps + 1)
+        signal_grid = self._photon_rates(mag_grid, filter_name) * self._photon_to_electron
+        return mag_grid, signal_grid
+
+    def _signal_for_mag(self, star_flux, filter_name):
+        """
+        Computes the signal collected from a star.
         :param star_flux: Star flux value.
         :param filter_name: Name of the filter.
-        :return: SNR value.
-        """
-        photons = hmbp.for_flux_in_filter(filter_name, star_flux, instrument="HAWKI", observatory="Paranal")
-        signal = photons * self.collection_area * self.quantum_efficiency * self.exposure_time
-        total_noise = np.sqrt(
-            signal.value
-            + self.sky_noise(filter_name).value
-            + self.dark_current_noise().value
-            + self.read_noise().value
-        )
-        snr_aper = signal.value / total_noise
-        return snr_aper
+        :return: Signal in electrons (float, or ndarray for an array of Vega magnitudes).
+        """
+        mag = _vega_mag(star_flux)
+        if mag is None:
+            # AB magnitudes and flux densities need hmbp to integrate the matching spectrum over the filter
+            photons = hmbp.for_flux_in_filter(filter_name, star_flux, instrument="HAWKI", observatory="Paranal")
+            photons = photons.to_value(self._PHOTON_RATE_UNIT)
+        else:
+            photons = self._photon_rates(mag, filter_name)
+        return photons * self._photon_to_electron
+
+    def compute_sn(self, star_flux, filter_name="Ks", bg=None):
+        """
+        Computes the signal-to-noise ratio (SNR) for a given star flux and filter name.
+        :param star_flux: Star flux value, or array of Vega magnitudes.
+        :param filter_name: Name of the filter.
+        :param bg: Precomputed total background in electrons. Computed (and cached) if not given.
+        :return: SNR value (ndarray for array input).
+        """
+        if bg is None:
+            bg = self._background_electrons(filter_name)
+        signal = self._signal_for_mag(star_flux, filter_name)
+        if np.ndim(signal):
+            return _snr(signal, bg)
+        return signal / sqrt(signal + bg)
 
     def flux_to_mag(self, flux, zero_point_flux_photon):
         """
         Convert flux to magnitude using the zero-point flux.
-        :param flux: The flux value.
-        :param zero_point_flux_photon: The zero-point flux for the filter in photon units.
+        :param flux: The flux value in electrons.
+        :param zero_point_flux_photon: The zero-point flux for the filter in photon units (ph / s / m^2 if a float).
         :return: magnitude.
         """
-        F0_electron = zero_point_flux_photon * self.collection_area * self.quantum_efficiency * self.exposure_time
+        zero_point = u.Quantity(zero_point_flux_photon, self._PHOTON_RATE_UNIT).to_value(self._PHOTON_RATE_UNIT)
+        F0_electron = zero_point * self._photon_to_electron
         magnitude = -2.5 * np.log10(
-            flux / F0_electron.value)
+            flux / F0_electron)
         return magnitude
 
     def detectable_star_brightness(self, desired_sn=5, filter_name="Ks"):
@@ -117,20 +315,16 @@ class HAWKI_ETC:
         :return: Detectable star brightness in magnitude.
         """
         # Calculate the total noise
-        total_noise = np.sqrt(
-            self.sky_noise(filter_name).value
-            + self.dark_current_noise().value
-            + self.read_noise().value
-        )
+        total_noise = sqrt(self._background_electrons(filter_name))
 
-        # Calculate the flux required for the desired SNR
-        required_flux = desired_sn * total_noise * u.electron
+        # Calculate the flux required for the desired SNR, in electrons
+        required_flux = desired_sn * total_noise
 
-        # Get the zero-point for the filter
-        zero_point_flux_photon = hmbp.in_zero_vega_mags(filter_name, "HAWKI", "Paranal")
+        # Get the zero-point for the filter, in ph / s / m^2
+        zero_point_flux_photon = _cached_zero_vega(filter_name)
 
         # Convert this flux to a magnitude using the zero-point magnitude
-        mag = self.flux_to_mag(required_flux.value, zero_point_flux_photon)
+        mag = self.flux_to_mag(required_flux, zero_point_flux_photon)
 
         return mag
 
@@ -138,30 +332,32 @@ class HAWKI_ETC:
         """
         Plots the SNR as a function of star brightness.
 
-        :param snr: Signal-to-noise ratio threshold.
+        :param snr: Signal-to-noise ratio threshold, or a sequence of thresholds.
         :param savefig: Boolean indicating if the plot should be saved.
-        :param filename: Filename to save the plot.
+        :param filename: Filename (or path / file object) to save the plot.
         :return: Plot figure.
         """
         fig, ax = plt.subplots()
-        brightness_list = np.arange(26, 8, -0.1)
-        snr_aper_list = [self.compute_sn(brightness * u.mag) for brightness in brightness_list]
-        ax.scatter(brightness_list, snr_aper_list, s=5, color="black")
-        if isinstance(snr, (float, int, list, np.ndarray)):
-            ax.axhline(snr, color='red', linestyle='--')
-        ax.set_xlim(min(brightness_list), max(brightness_list))
+        brightness_list = np.linspace(26.0, 8.1, 180) # 0.1 mag steps, strictly decreasing
+        mags = brightness_list << u.mag
+        snr_aper_list = self.compute_sn(mags, "Ks")
+        ax.semilogy(brightness_list, snr_aper_list, "k.", markersize=3)
+        # Accept a single threshold or any (nested) sequence of them, anything that converts to floats
+        # (numeric strings included); draw nothing for values that do not
+        try:
+            thresholds = [] if snr is None else np.asarray(snr, dtype=float).ravel()
+        except (TypeError, ValueError):
+            thresholds = []
+        for threshold in thresholds:
+            ax.axhline(threshold, color='red', linestyle='--')
+        ax.set_xlim(brightness_list[-1], brightness_list[0])
         ax.set_xlabel("Brightness (Magnitude)")
         ax.set_ylabel("SNR")
         ax.grid(True, which="major", ls="--", linewidth=0.5)  # <-- Changed this line
-        ax.set_yscale("log")
         ax.set_title("SNR as a function of Star Brightness")
         if savefig:
-            if isinstance(filename, str):
-                plt.savefig(filename)
-            else:
-                raise TypeError(
-                    f"filename has to be a string, {type(filename)} is given."
-                )
+            # Accepts anything `savefig` does (str, path or file object) and leaves reporting invalid ones to matplotlib
+            plt.savefig(filename)
         plt.show()
         return fig
 
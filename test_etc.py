@@ -1,5 +1,7 @@
 from etc_module_hmbp import HAWKI_ETC
 from astropy import units as u
+import hmbp
+import numpy as np
 
 def test_sky_noise():
     etc = HAWKI_ETC()
@@ -21,6 +23,36 @@ def test_compute_sn():
     snr = etc.compute_sn(23.3 * u.mag, "Ks")
     assert 4 < snr < 6, f"Expected SNR around 5, but got {snr}"
 
+def test_photon_rates():
+    etc = HAWKI_ETC()
+    rate = etc._photon_rates(23.3 * u.mag, "Ks")
+    expected = hmbp.for_flux_in_filter("Ks", 23.3 * u.mag, instrument="HAWKI", observatory="Paranal")
+    expected = expected.to_value(u.ph / u.s / u.m ** 2)
+    assert abs(rate - expected) < 1e-6 * expected, f"Expected photon rate {expected}, but got {rate}"
+
+def test_compute_sn_with_precomputed_background():
+    etc = HAWKI_ETC()
+    bg = etc._background_electrons("Ks")
+    snr = etc.compute_sn(23.3 * u.mag, "Ks", bg=bg)
+    assert snr == etc.compute_sn(23.3 * u.mag, "Ks"), "Expected the same SNR with a precomputed background"
+
+def test_precompute_grid():
+    etc = HAWKI_ETC()
+    mag_grid, signal_grid = etc.precompute_grid("Ks", mag_min=8, mag_max=26, step=0.1)
+    assert len(mag_grid) == len(signal_grid) == 181, f"Expected 181 grid points, but got {len(mag_grid)}"
+    assert mag_grid[0] == 8 and mag_grid[-1] == 26, f"Expected a grid from 8 to 26, but got {mag_grid[0]} to {mag_grid[-1]}"
+    expected = etc._signal_for_mag(mag_grid, "Ks")
+    assert np.allclose(signal_grid, expected), "Expected the tabulated signal to match _signal_for_mag"
+
+def test_precompute_grid_invalid_range():
+    etc = HAWKI_ETC()
+    for kwargs in ({"mag_min": 26, "mag_max": 8}, {"step": 0}):
+        try:
+            etc.precompute_grid("Ks", **kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"Expected a ValueError for {kwargs}")
+
 def test_detectable_star_brightness():
     etc = HAWKI_ETC()
     brightness = etc.detectable_star_brightness(5, "Ks")
@@ -36,6 +68,10 @@ if __name__ == "__main__":
     test_dark_current_noise()
     test_read_noise()
     test_compute_sn()
+    test_photon_rates()
+    test_compute_sn_with_precomputed_background()
+    test_precompute_grid()
+    test_precompute_grid_invalid_range()
     test_detectable_star_brightness()
     test_plot_function()
 